@@ -3,14 +3,61 @@ Configuration management module for SQL Data Importer.
 Handles database credentials and application settings securely.
 """
 import os
+import re
 from dataclasses import dataclass
-from typing import Optional
+from functools import cached_property, lru_cache
+from typing import Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Minimal INI grammar: "[section]" headers and "key = value" / "key: value" lines
+_INI_SECTION = re.compile(r'^\[([^\]]+)\]$')
+_INI_KEY_VALUE = re.compile(r'^([^=:]+?)\s*[=:]\s*(.*)$')
 
-@dataclass
+
+@lru_cache(maxsize=4)
+def _parse_ini(filepath: str, mtime_ns: int) -> Dict[str, Dict[str, str]]:
+    """
+    Parse a simple INI file into {section: {key: value}}.
+    
+    Keys are lower-cased and [DEFAULT] values are inherited by every other
+    section, like ConfigParser does; a leading UTF-8 BOM is ignored. The
+    file's mtime is part of the cache key, so an edited file is parsed
+    again on the next load.
+    """
+    sections: Dict[str, Dict[str, str]] = {}
+    current: Optional[Dict[str, str]] = None
+    
+    with open(filepath, encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] in "#;":
+                continue
+            
+            match = _INI_SECTION.match(line)
+            if match:
+                current = sections.setdefault(match.group(1).strip(), {})
+                continue
+            
+            match = _INI_KEY_VALUE.match(line)
+            if match and current is not None:
+                current[match.group(1).lower()] = match.group(2)
+    
+    defaults = sections.pop("DEFAULT", {})
+    return {name: {**defaults, **values} for name, values in sections.items()}
+
+
+def _read_ini(filepath: str) -> Dict[str, Dict[str, str]]:
+    """Read an INI file through the parse cache; a missing file reads as empty."""
+    try:
+        mtime_ns = os.stat(filepath).st_mtime_ns
+    except OSError:
+        return {}
+    return _parse_ini(filepath, mtime_ns)
+
+
+@dataclass(frozen=True)
 class DatabaseConfig:
     """Database configuration with secure credential handling."""
     server: str
@@ -24,27 +71,26 @@ class DatabaseConfig:
     @classmethod
     def from_env(cls) -> 'DatabaseConfig':
         """Load configuration from environment variables."""
+        env = os.environ
         required_vars = ['DB_SERVER', 'DB_NAME', 'DB_USER', 'DB_PASSWORD']
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
+        missing_vars = [var for var in required_vars if not env.get(var)]
         
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
         
         return cls(
-            server=os.getenv('DB_SERVER'),
-            database=os.getenv('DB_NAME'),
-            uid=os.getenv('DB_USER'),
-            pwd=os.getenv('DB_PASSWORD'),
-            table_name=os.getenv('DB_TABLE', 'AllTagslist'),
-            tag_column=os.getenv('TAG_COLUMN', 'Tag Number')
+            server=env['DB_SERVER'],
+            database=env['DB_NAME'],
+            uid=env['DB_USER'],
+            pwd=env['DB_PASSWORD'],
+            table_name=env.get('DB_TABLE', 'AllTagslist'),
+            tag_column=env.get('TAG_COLUMN', 'Tag Number')
         )
     
     @classmethod
     def from_file(cls, filepath: str) -> 'DatabaseConfig':
         """Load configuration from a config file (INI format)."""
-        import configparser
-        config = configparser.ConfigParser()
-        config.read(filepath)
+        config = _read_ini(filepath)
         
         if 'database' not in config:
             raise ValueError("Config file must contain [database] section")
@@ -59,8 +105,9 @@ class DatabaseConfig:
             tag_column=db_config.get('tag_column', 'Tag Number')
         )
     
-    def get_connection_string(self) -> str:
-        """Generate ODBC connection string."""
+    @cached_property
+    def connection_string(self) -> str:
+        """ODBC connection string, built once per config instance."""
         return (
             f"Driver={{{self.driver}}};"
             f"Server={self.server};"
@@ -69,6 +116,10 @@ class DatabaseConfig:
             f"PWD={self.pwd}"
         )
     
+    def get_connection_string(self) -> str:
+        """Generate ODBC connection string."""
+        return self.connection_string
+    
     def __repr__(self) -> str:
         """Safe string representation without exposing password."""
         return (
@@ -84,15 +135,20 @@ class AppConfig:
     tooltip_wait_time: int = 500
     float_comparison_threshold: float = 1e-6
     connection_timeout: int = 5
+    max_sheet_workers: int = 8
+    metadata_cache_ttl: int = 600
     
     @classmethod
     def from_env(cls) -> 'AppConfig':
         """Load app configuration from environment variables."""
+        env = os.environ
         return cls(
-            batch_size=int(os.getenv('BATCH_SIZE', 2000)),
-            tooltip_wait_time=int(os.getenv('TOOLTIP_WAIT', 500)),
-            float_comparison_threshold=float(os.getenv('FLOAT_THRESHOLD', 1e-6)),
-            connection_timeout=int(os.getenv('CONNECTION_TIMEOUT', 5))
+            batch_size=int(env.get('BATCH_SIZE', 2000)),
+            tooltip_wait_time=int(env.get('TOOLTIP_WAIT', 500)),
+            float_comparison_threshold=float(env.get('FLOAT_THRESHOLD', 1e-6)),
+            connection_timeout=int(env.get('CONNECTION_TIMEOUT', 5)),
+            max_sheet_workers=int(env.get('MAX_SHEET_WORKERS', 8)),
+            metadata_cache_ttl=int(env.get('METADATA_CACHE_TTL', 600))
         )
 
 
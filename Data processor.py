@@ -3,15 +3,63 @@ Data processing module for Excel file handling and validation.
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Set, Tuple, Callable, Optional
+from typing import AbstractSet, Dict, Iterable, List, Tuple, Callable, Optional
 from dataclasses import dataclass
 import logging
 import os
+import re
+import threading
 from datetime import datetime
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+import xlsxwriter
 
 logger = logging.getLogger(__name__)
 
+# Prefer the Rust-backed calamine reader when python-calamine is installed;
+# otherwise let pandas pick per file (openpyxl for .xlsx, xlrd for .xls)
+try:
+    from python_calamine import CalamineWorkbook
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    CalamineWorkbook = None
+    EXCEL_ENGINE = None
+
+# numexpr evaluates the float-threshold check without the GIL, if present
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+# Arrow-backed strings run strip/compare in C++ kernels, if pyarrow is present
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = str
+
+# Control characters removed from Excel headers before column mapping
+_HEADER_CONTROL_CHARS = re.compile(r'[\n\r\t]')
+
+
+def get_sheet_names(filepath: str) -> List[str]:
+    """
+    List the sheets of a workbook without parsing any of them.
+    
+    Args:
+        filepath: Path to Excel file
+        
+    Returns:
+        Sheet names in workbook order
+    """
+    if CalamineWorkbook is not None:
+        workbook = CalamineWorkbook.from_path(filepath)
+        try:
+            return list(workbook.sheet_names)
+        finally:
+            workbook.close()
+    
+    with pd.ExcelFile(filepath, engine=EXCEL_ENGINE) as xls:
+        return xls.sheet_names
+
 
 @dataclass
 class ProcessingConfig:
@@ -40,6 +88,22 @@ class SheetResult:
     update_count: int = 0
 
 
+@dataclass
+class ParsedSheet:
+    """A sheet read from Excel, validated and ready to diff against SQL."""
+    sheet_name: str
+    data: Optional[pd.DataFrame]  # None when the sheet was skipped
+    columns: List[str]  # Value columns to compare (excludes the tag column)
+    validation_errors: List[ValidationError]
+    skip_result: Optional[SheetResult] = None
+    
+    def tags(self, tag_column: str) -> List[str]:
+        """Distinct tags present in the sheet."""
+        if self.data is None:
+            return []
+        return self.data[tag_column].unique().tolist()
+
+
 class ConfigLoader:
     """Loads processing configuration from Excel file."""
     
@@ -59,36 +123,35 @@ class ConfigLoader:
         """
         try:
             logger.info(f"Loading processing config from: {filepath}")
-            xls = pd.ExcelFile(filepath)
-            
-            # Load column mapping
-            df_map = pd.read_excel(xls, "Column_Mapping").dropna(
-                subset=["Excel_Header", "SQL_Column"]
-            )
-            column_mapping = dict(
-                zip(
-                    df_map["Excel_Header"].astype(str).str.strip(),
-                    df_map["SQL_Column"].astype(str).str.strip()
+            with pd.ExcelFile(filepath, engine=EXCEL_ENGINE) as xls:
+                # Load column mapping
+                df_map = pd.read_excel(xls, "Column_Mapping").dropna(
+                    subset=["Excel_Header", "SQL_Column"]
+                )
+                column_mapping = dict(
+                    zip(
+                        df_map["Excel_Header"].astype(str).str.strip(),
+                        df_map["SQL_Column"].astype(str).str.strip()
+                    )
+                )
+                
+                # Load allowed sheets
+                allowed_sheets = (
+                    pd.read_excel(xls, "Allowed_Sheets")["Sheet_Name"]
+                    .dropna()
+                    .astype(str)
+                    .str.strip()
+                    .tolist()
+                )
+                
+                # Load ignored headers
+                ignored_headers = (
+                    pd.read_excel(xls, "Ignored_Headers")["Header_Name"]
+                    .dropna()
+                    .astype(str)
+                    .str.strip()
+                    .tolist()
                 )
-            )
-            
-            # Load allowed sheets
-            allowed_sheets = (
-                pd.read_excel(xls, "Allowed_Sheets")["Sheet_Name"]
-                .dropna()
-                .astype(str)
-                .str.strip()
-                .tolist()
-            )
-            
-            # Load ignored headers
-            ignored_headers = (
-                pd.read_excel(xls, "Ignored_Headers")["Header_Name"]
-                .dropna()
-                .astype(str)
-                .str.strip()
-                .tolist()
-            )
             
             logger.info(
                 f"Config loaded: {len(column_mapping)} mappings, "
@@ -110,6 +173,7 @@ class DataValidator:
     
     def __init__(self, numeric_columns: List[str], float_threshold: float = 1e-6):
         self.numeric_columns = numeric_columns
+        self._numeric_set = frozenset(numeric_columns)
         self.float_threshold = float_threshold
     
     def validate_numeric_columns(
@@ -121,6 +185,9 @@ class DataValidator:
         """
         Validate and convert numeric columns, collecting errors.
         
+        Numeric columns are converted in place on df; other columns are
+        left untouched.
+        
         Args:
             df: DataFrame to validate
             sheet_name: Name of the sheet (for error reporting)
@@ -130,58 +197,55 @@ class DataValidator:
             Tuple of (validated_df, list_of_errors)
         """
         errors = []
-        validated_df = df.copy()
-        raw_df = df.copy()
+        tags = df[tag_column].to_numpy()
         
         for col in self.numeric_columns:
             if col not in df.columns:
                 continue
             
-            # Attempt conversion
-            validated_df[col] = pd.to_numeric(df[col], errors="coerce")
+            # Attempt conversion, keeping the raw column for error reporting
+            raw = df[col]
+            converted = pd.to_numeric(raw, errors="coerce")
+            df[col] = converted
             
             # Find conversion failures
             mask = (
-                validated_df[col].isna() & 
-                raw_df[col].notna() & 
-                (raw_df[col].astype(str).str.strip() != "")
+                converted.isna().to_numpy() & 
+                raw.notna().to_numpy() & 
+                (raw.astype(TEXT_DTYPE).str.strip() != "").to_numpy(
+                    dtype=bool, na_value=False
+                )
             )
             
             # Log errors
-            for _, row in raw_df[mask].iterrows():
-                errors.append(
-                    ValidationError(
-                        sheet_name=sheet_name,
-                        tag_number=row[tag_column],
-                        excel_header=col,
-                        invalid_value=row[col],
-                        error_reason="Type Mismatch - Expected numeric value"
-                    )
+            errors.extend(
+                ValidationError(
+                    sheet_name=sheet_name,
+                    tag_number=tag,
+                    excel_header=col,
+                    invalid_value=value,
+                    error_reason="Type Mismatch - Expected numeric value"
                 )
+                for tag, value in zip(tags[mask], raw.to_numpy()[mask])
+            )
         
         logger.info(f"Validation found {len(errors)} type errors in sheet '{sheet_name}'")
-        return validated_df, errors
+        return df, errors
     
-    def compare_values(self, excel_val: any, sql_val: any) -> bool:
+    def partition_columns(self, columns: List[str]) -> Tuple[List[int], List[int]]:
         """
-        Compare two values considering data types.
+        Split columns into numeric and non-numeric positions.
         
         Args:
-            excel_val: Value from Excel
-            sql_val: Value from SQL database
+            columns: Columns to compare, in order
             
         Returns:
-            True if values are different, False if same
+            Tuple of (numeric_positions, other_positions) into columns
         """
-        if excel_val is None:
-            return False
-        
-        # Float comparison with threshold
-        if isinstance(excel_val, float) and isinstance(sql_val, float):
-            return abs(excel_val - sql_val) > self.float_threshold
-        
-        # Standard comparison
-        return excel_val != sql_val
+        numeric_idx, other_idx = [], []
+        for i, col in enumerate(columns):
+            (numeric_idx if col in self._numeric_set else other_idx).append(i)
+        return numeric_idx, other_idx
 
 
 class SheetProcessor:
@@ -198,71 +262,127 @@ class SheetProcessor:
         self.sql_columns = sql_columns
         self.validator = validator
         self.tag_column = tag_column
+        
+        # SQL-side names of every column the sheet processing can use
+        self._wanted_columns = (
+            set(sql_columns) - set(processing_config.ignored_headers)
+        ) | {tag_column}
+        
+        # Headers that map to the tag column are read as text, which skips
+        # pandas' type inference for the join key
+        self._read_dtypes = {tag_column: str}
+        self._read_dtypes.update(
+            (header, str)
+            for header, column in processing_config.column_mapping.items()
+            if column == tag_column
+        )
+        
+        # Raw Excel header -> cleaned and mapped column name, shared by sheets
+        self._header_cache: Dict[str, str] = {}
+        
+        # Categorical dtype over the database tags, rebuilt only for a new tag set
+        self._tag_dtype: Optional[pd.CategoricalDtype] = None
+        self._tag_dtype_source: Optional[AbstractSet[str]] = None
+        self._tag_dtype_lock = threading.Lock()
+    
+    def _map_header(self, header) -> str:
+        """Clean a raw Excel header and apply the column mapping."""
+        header = str(header)
+        mapped = self._header_cache.get(header)
+        
+        if mapped is None:
+            cleaned = _HEADER_CONTROL_CHARS.sub('', header.replace('\xa0', ' ')).strip()
+            mapped = self.config.column_mapping.get(cleaned, cleaned)
+            self._header_cache[header] = mapped
+        
+        return mapped
+    
+    def _is_needed_header(self, header) -> bool:
+        """Check whether a raw Excel header maps to a column we will use."""
+        return self._map_header(header) in self._wanted_columns
     
-    def process_sheet(
+    def _get_tag_dtype(self, existing_tags: AbstractSet[str]) -> pd.CategoricalDtype:
+        """
+        Return a categorical dtype whose categories are the existing tags.
+        
+        Sheets are read on several threads at once; the lock makes the
+        first of them build the (expensive) dtype and the rest reuse it.
+        """
+        with self._tag_dtype_lock:
+            if self._tag_dtype is None or self._tag_dtype_source is not existing_tags:
+                self._tag_dtype = pd.CategoricalDtype(categories=list(existing_tags))
+                self._tag_dtype_source = existing_tags
+            return self._tag_dtype
+    
+    def read_sheet(
         self,
-        excel_path: str,
+        excel_file: pd.ExcelFile,
         sheet_name: str,
-        existing_tags: Set[str],
-        sql_data: pd.DataFrame,
+        existing_tags: AbstractSet[str],
         progress_callback: Optional[Callable[[str], None]] = None
-    ) -> Tuple[SheetResult, List[Tuple[str, Dict]], List[ValidationError]]:
+    ) -> ParsedSheet:
         """
-        Process a single Excel sheet and identify updates.
+        Parse, filter and validate a single Excel sheet.
+        
+        The sheet is read from the workbook exactly once; the result holds
+        everything diff() needs, so no SQL data is required at this stage.
         
         Args:
-            excel_path: Path to Excel file
-            sheet_name: Name of sheet to process
+            excel_file: Open workbook handle, shared across sheets
+            sheet_name: Name of sheet to read
             existing_tags: Set of tags that exist in database
-            sql_data: DataFrame with current SQL data for matching tags
             progress_callback: Optional callback for progress updates
             
         Returns:
-            Tuple of (SheetResult, list_of_updates, list_of_validation_errors)
+            ParsedSheet with the cleaned data, or a skip result
         """
         if progress_callback:
             progress_callback(f"Processing sheet: {sheet_name}")
         
         logger.info(f"Processing sheet: {sheet_name}")
         
-        # Load sheet
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
-        
-        # Clean column names
-        df.columns = (
-            df.columns.str.strip()
-            .str.replace('\xa0', ' ')
-            .str.replace(r'[\n\r\t]', '', regex=True)
+        # Load sheet, skipping columns that can never reach the database
+        df = pd.read_excel(
+            excel_file,
+            sheet_name=sheet_name,
+            usecols=self._is_needed_header,
+            dtype=self._read_dtypes
         )
         
-        # Apply column mapping
-        df.rename(columns=lambda x: self.config.column_mapping.get(x, x), inplace=True)
+        # Clean column names and apply column mapping in one pass
+        df.columns = [self._map_header(c) for c in df.columns]
         
         # Validate tag column exists
         if self.tag_column not in df.columns:
             logger.warning(f"Sheet '{sheet_name}' missing tag column")
-            return (
-                SheetResult(sheet_name, "Tag Column Missing", "SKIP"),
-                [],
-                []
+            return ParsedSheet(
+                sheet_name, None, [], [],
+                SheetResult(sheet_name, "Tag Column Missing", "SKIP")
             )
         
-        # Clean and filter tags
-        df[self.tag_column] = df[self.tag_column].astype(str).str.strip()
-        df = df[df[self.tag_column].isin(existing_tags)]
+        # Clean and filter tags; tags unknown to the database get code -1
+        tag_dtype = self._get_tag_dtype(existing_tags)
+        codes = tag_dtype.categories.get_indexer(
+            df[self.tag_column].astype(TEXT_DTYPE).str.strip()
+        )
+        known = codes >= 0
+        df = df[known].assign(**{
+            self.tag_column: pd.Categorical.from_codes(codes[known], dtype=tag_dtype)
+        })
         
         if df.empty:
             logger.info(f"Sheet '{sheet_name}' has no valid tags")
-            return (
-                SheetResult(sheet_name, "No Valid Tags", "SKIP"),
-                [],
-                []
+            return ParsedSheet(
+                sheet_name, None, [], [],
+                SheetResult(sheet_name, "No Valid Tags", "SKIP")
             )
         
-        # Select valid columns
+        # Select valid columns (the tag column is the join key, not a value)
         valid_columns = [
             c for c in df.columns 
-            if c in self.sql_columns and c not in self.config.ignored_headers
+            if c in self.sql_columns 
+            and c not in self.config.ignored_headers 
+            and c != self.tag_column
         ]
         df = df[valid_columns + [self.tag_column]]
         
@@ -274,8 +394,36 @@ class SheetProcessor:
         # Clean up nulls and empty strings
         df = self._clean_dataframe(df)
         
-        # Identify updates
-        updates = self._identify_updates(df, sql_data, valid_columns)
+        return ParsedSheet(sheet_name, df, valid_columns, validation_errors)
+    
+    def diff(
+        self,
+        parsed: ParsedSheet,
+        sql_data: Iterable[pd.DataFrame]
+    ) -> Tuple[SheetResult, List[Tuple[str, Dict]]]:
+        """
+        Compare a parsed sheet against current SQL data.
+        
+        Args:
+            parsed: Sheet returned by read_sheet()
+            sql_data: Chunks of current SQL data for the sheet's tags
+            
+        Returns:
+            Tuple of (SheetResult, list_of_updates)
+        """
+        if parsed.data is None:
+            return parsed.skip_result, []
+        
+        sheet_name = parsed.sheet_name
+        
+        # Identify updates one SQL chunk at a time; the numeric/other split
+        # is fixed for the sheet, so work it out once
+        partition = self.validator.partition_columns(parsed.columns)
+        updates = []
+        for sql_chunk in sql_data:
+            updates.extend(
+                self._identify_updates(parsed.data, sql_chunk, parsed.columns, partition)
+            )
         
         if updates:
             result_str = f"{len(updates)} changes detected"
@@ -284,29 +432,19 @@ class SheetProcessor:
             result_str = "No changes"
             logger.info(f"Sheet '{sheet_name}': No changes detected")
         
-        return (
-            SheetResult(sheet_name, result_str, "DRY-RUN", len(updates)),
-            updates,
-            validation_errors
-        )
+        return SheetResult(sheet_name, result_str, "DRY-RUN", len(updates)), updates
     
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean DataFrame by replacing NaN and empty strings with None."""
-        df = df.replace({np.nan: None})
-        
-        # Use map() for pandas >= 2.1, applymap() for older versions
-        try:
-            df = df.map(lambda x: x if x is not None and x != "" else None)
-        except AttributeError:
-            df = df.applymap(lambda x: x if x is not None and x != "" else None)
-        
-        return df
+        df = df.astype(object)
+        return df.where(df.notna() & (df != ""), None)
     
     def _identify_updates(
         self,
         excel_df: pd.DataFrame,
         sql_df: pd.DataFrame,
-        columns_to_check: List[str]
+        columns_to_check: List[str],
+        partition: Optional[Tuple[List[int], List[int]]] = None
     ) -> List[Tuple[str, Dict]]:
         """
         Identify which records need updates by comparing Excel vs SQL data.
@@ -315,33 +453,81 @@ class SheetProcessor:
             excel_df: DataFrame from Excel
             sql_df: DataFrame from SQL
             columns_to_check: List of columns to compare
+            partition: Precomputed (numeric_positions, other_positions) for
+                columns_to_check; computed here if omitted
             
         Returns:
             List of (tag_number, {column: new_value}) tuples
         """
-        updates = []
+        if not columns_to_check:
+            return []
+        
+        # Hash-index the SQL tags once; the first SQL row wins for duplicate tags
+        sql_tags = sql_df[self.tag_column].astype(TEXT_DTYPE).str.strip()
+        first_rows = np.flatnonzero(~sql_tags.duplicated().to_numpy())
+        sql_index = pd.Index(sql_tags.to_numpy()[first_rows])
+        
+        # O(1) lookup per Excel tag; -1 marks tags with no SQL record
+        positions = sql_index.get_indexer(excel_df[self.tag_column])
+        excel_rows = np.flatnonzero(positions >= 0)
+        
+        if excel_rows.size == 0:
+            return []
+        
+        sql_rows = first_rows[positions[excel_rows]]
+        
+        # Boolean "changed" matrix: one row per matched tag, one column per check
+        changed = np.zeros((excel_rows.size, len(columns_to_check)), dtype=bool)
         
-        for _, excel_row in excel_df.iterrows():
-            tag = excel_row[self.tag_column]
-            sql_match = sql_df[sql_df[self.tag_column] == tag]
+        numeric_idx, other_idx = (
+            partition or self.validator.partition_columns(columns_to_check)
+        )
+        
+        if numeric_idx:
+            # Compare all numeric columns as one 2D float block
+            numeric_cols = [columns_to_check[i] for i in numeric_idx]
+            a = self._to_float_block(excel_df[numeric_cols].iloc[excel_rows])
+            b = self._to_float_block(sql_df[numeric_cols].iloc[sql_rows])
+            threshold = self.validator.float_threshold
             
-            if sql_match.empty:
-                continue
+            if numexpr is not None:
+                differs = numexpr.evaluate("abs(a - b) > threshold")
+            else:
+                differs = np.abs(a - b) > threshold
             
-            sql_row = sql_match.iloc[0]
-            changes = {}
+            changed[:, numeric_idx] = ~np.isnan(a) & (np.isnan(b) | differs)
+        
+        if other_idx:
+            other_cols = [columns_to_check[i] for i in other_idx]
+            a = excel_df[other_cols].to_numpy(dtype=object)[excel_rows]
+            b = sql_df[other_cols].to_numpy(dtype=object)[sql_rows]
             
-            for col in columns_to_check:
-                excel_val = excel_row[col]
-                sql_val = sql_row[col]
-                
-                if self.validator.compare_values(excel_val, sql_val):
-                    changes[col] = excel_val
+            sql_missing = pd.isna(b)
+            b = np.where(sql_missing, None, b)
             
-            if changes:
-                updates.append((tag, changes))
+            changed[:, other_idx] = pd.notna(a) & (sql_missing | (a != b).astype(bool))
+        
+        tags = excel_df[self.tag_column].to_numpy()[excel_rows]
+        values = excel_df[columns_to_check].to_numpy(dtype=object)[excel_rows]
         
-        return updates
+        return [
+            (
+                tags[i],
+                {
+                    col: values[i, j]
+                    for j, col in enumerate(columns_to_check)
+                    if changed[i, j]
+                }
+            )
+            for i in np.flatnonzero(changed.any(axis=1))
+        ]
+    
+    @staticmethod
+    def _to_float_block(df: pd.DataFrame) -> np.ndarray:
+        """Convert columns to a 2D float array, with NaN for anything missing."""
+        return df.apply(pd.to_numeric, errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan
+        )
 
 
 class ReportGenerator:
@@ -376,8 +562,7 @@ class ReportGenerator:
             
             df = pd.DataFrame(error_data)
             
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                ReportGenerator._format_excel_output(writer, df, "Errors")
+            ReportGenerator._write_excel_output(output_path, df, "Errors")
             
             logger.info(f"Error report saved: {output_path}")
             return True
@@ -387,47 +572,63 @@ class ReportGenerator:
             return False
     
     @staticmethod
-    def _format_excel_output(writer, df: pd.DataFrame, sheet_name: str = "Errors"):
-        """Apply formatting to Excel output."""
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-        worksheet = writer.sheets[sheet_name]
-        
-        # Header styling
-        header_font = Font(bold=True, color="000000")
-        header_fill = PatternFill(
-            start_color="D3D3D3", 
-            end_color="D3D3D3", 
-            fill_type="solid"
-        )
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+    def _write_excel_output(output_path: str, df: pd.DataFrame, sheet_name: str = "Errors"):
+        """
+        Write a DataFrame to a formatted single-sheet workbook.
+        
+        Uses xlsxwriter in constant-memory mode: rows are streamed to disk
+        in order, and formats are registered once rather than per cell.
+        """
+        # Report cells must show the input exactly as typed, so strings are
+        # never promoted to hyperlinks or formulas
+        workbook = xlsxwriter.Workbook(output_path, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'strings_to_formulas': False
+        })
         
-        # Format header row
-        for cell in worksheet[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Auto-adjust column widths and add borders
-        for col in worksheet.columns:
-            max_length = 0
-            column_letter = col[0].column_letter
+        try:
+            worksheet = workbook.add_worksheet(sheet_name)
+            
+            header_format = workbook.add_format({
+                'bold': True,
+                'font_color': '#000000',
+                'bg_color': '#D3D3D3',
+                'border': 1,
+                'align': 'center',
+                'valign': 'vcenter'
+            })
+            cell_format = workbook.add_format({'border': 1})
+            date_format = workbook.add_format({
+                'border': 1,
+                'num_format': 'yyyy-mm-dd hh:mm:ss'
+            })
+            
+            headers = [str(c) for c in df.columns]
+            values = df.astype(object).where(df.notna(), None)
+            
+            # Column widths from vectorized string lengths of each column
+            widths = [len(h) for h in headers]
+            if not values.empty:
+                value_widths = values.astype(str).apply(lambda col: col.str.len().max())
+                widths = [max(w, int(v)) for w, v in zip(widths, value_widths)]
+            
+            for col_idx, width in enumerate(widths):
+                worksheet.set_column(col_idx, col_idx, width + 2)
             
-            for cell in col:
-                cell.border = thin_border
-                try:
-                    cell_length = len(str(cell.value))
-                    if cell_length > max_length:
-                        max_length = cell_length
-                except:
-                    pass
+            # Header row
+            worksheet.write_row(0, 0, headers, header_format)
             
-            worksheet.column_dimensions[column_letter].width = max_length + 2
+            # Data rows
+            for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+                for col_idx, value in enumerate(row):
+                    if isinstance(value, datetime):
+                        worksheet.write_datetime(row_idx, col_idx, value, date_format)
+                    else:
+                        worksheet.write(row_idx, col_idx, value, cell_format)
+        
+        finally:
+            workbook.close()
     
     @staticmethod
     def generate_report_filename(input_path: str, report_type: str = "ImportErrors") -> str:
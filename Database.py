@@ -3,14 +3,21 @@ Database operations module with secure query handling.
 """
 import pyodbc
 import pandas as pd
-from typing import List, Dict, Set, Optional, Tuple
+from typing import FrozenSet, Iterator, List, Dict, Optional, Tuple
 import logging
+from collections import defaultdict
 from contextlib import contextmanager
 
 from config import DatabaseConfig
 
 logger = logging.getLogger(__name__)
 
+# SQL Server data types treated as numeric during validation
+NUMERIC_TYPES = frozenset({
+    "decimal", "numeric", "float", "real",
+    "int", "bigint", "smallint", "tinyint"
+})
+
 
 class DatabaseConnectionError(Exception):
     """Raised when database connection fails."""
@@ -28,6 +35,7 @@ class DatabaseManager:
     def __init__(self, config: DatabaseConfig):
         self.config = config
         self._connection: Optional[pyodbc.Connection] = None
+        self._metadata_cache: Optional[Tuple[List[str], List[str]]] = None
     
     def test_connection(self, timeout: int = 5) -> Tuple[bool, Optional[str]]:
         """
@@ -92,10 +100,39 @@ class DatabaseManager:
             # Don't close here - let the caller manage connection lifecycle
             pass
     
+    @contextmanager
+    def session(self) -> Iterator[pyodbc.Connection]:
+        """
+        Context manager for one unit of work on a database connection.
+        
+        An already open connection is reused, skipping a second login
+        handshake; otherwise a connection is opened here and closed again
+        on exit. Uncommitted work is rolled back if the block raises.
+        
+        Raises:
+            DatabaseConnectionError: If connection fails
+        """
+        owns_connection = self._connection is None
+        conn = self._connection or self.connect()
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Rollback failed: {e}")
+            raise
+        finally:
+            if owns_connection:
+                self.close()
+    
     def get_table_metadata(self, conn: pyodbc.Connection) -> Tuple[List[str], List[str]]:
         """
         Get table column names and identify numeric columns.
         
+        The result is cached after the first successful query; call
+        clear_metadata_cache() to pick up schema changes.
+        
         Args:
             conn: Database connection
             
@@ -105,41 +142,48 @@ class DatabaseManager:
         Raises:
             DatabaseQueryError: If query fails
         """
+        if self._metadata_cache is not None:
+            all_columns, numeric_columns = self._metadata_cache
+            return list(all_columns), list(numeric_columns)
+        
         try:
             query = """
                 SELECT COLUMN_NAME, DATA_TYPE 
                 FROM INFORMATION_SCHEMA.COLUMNS 
                 WHERE TABLE_NAME = ?
             """
-            df = pd.read_sql(query, conn, params=[self.config.table_name])
-            
-            all_columns = df["COLUMN_NAME"].tolist()
+            cursor = conn.cursor()
+            cursor.execute(query, self.config.table_name)
+            rows = cursor.fetchall()
             
-            numeric_types = [
-                "decimal", "numeric", "float", "real", 
-                "int", "bigint", "smallint", "tinyint"
-            ]
-            numeric_columns = df[
-                df["DATA_TYPE"].isin(numeric_types)
-            ]["COLUMN_NAME"].tolist()
+            all_columns = [row[0] for row in rows]
+            numeric_columns = [row[0] for row in rows if row[1] in NUMERIC_TYPES]
             
             logger.info(f"Retrieved metadata: {len(all_columns)} columns, "
                        f"{len(numeric_columns)} numeric")
             
-            return all_columns, numeric_columns
+            self._metadata_cache = (all_columns, numeric_columns)
+            return list(all_columns), list(numeric_columns)
         
         except Exception as e:
             raise DatabaseQueryError(f"Failed to retrieve table metadata: {e}")
     
-    def get_existing_tags(self, conn: pyodbc.Connection) -> Set[str]:
+    def clear_metadata_cache(self):
+        """Forget cached table metadata so the next lookup queries the database."""
+        self._metadata_cache = None
+    
+    def get_existing_tags(self, conn: pyodbc.Connection) -> FrozenSet[str]:
         """
         Retrieve all existing tag numbers from database.
         
+        The result is read-only: it is shared by the sheet-reading threads
+        and the metadata cache, and only ever used for membership.
+        
         Args:
             conn: Database connection
             
         Returns:
-            Set of tag numbers as strings
+            Frozen set of tag numbers as strings
             
         Raises:
             DatabaseQueryError: If query fails
@@ -148,12 +192,17 @@ class DatabaseManager:
             # Use parameterized query for table/column names is not standard,
             # but we control these values from config
             query = f"SELECT [{self.config.tag_column}] FROM {self.config.table_name}"
-            df = pd.read_sql(query, conn)
             
-            tags = set(
-                df[self.config.tag_column]
-                .astype(str)
-                .str.strip()
+            cursor = conn.cursor()
+            cursor.arraysize = 10000
+            cursor.execute(query)
+            
+            # Stream rows in blocks straight into the set, skipping NULL tags
+            tags = frozenset(
+                str(row[0]).strip()
+                for rows in iter(cursor.fetchmany, [])
+                for row in rows
+                if row[0] is not None
             )
             
             logger.info(f"Retrieved {len(tags)} existing tags from database")
@@ -166,45 +215,76 @@ class DatabaseManager:
         self, 
         conn: pyodbc.Connection, 
         tags: List[str],
-        batch_size: int = 2000
-    ) -> pd.DataFrame:
+        batch_size: int = 2000,
+        chunk_size: int = 5000
+    ) -> Iterator[pd.DataFrame]:
         """
-        Fetch records matching given tags using batched queries.
+        Stream records matching given tags from a single joined query.
+        
+        The tags are bulk-loaded into a session temp table, which is then
+        joined against the main table, so the server compiles one plan.
+        Results are yielded in chunks so the full result set is never held
+        in memory at once. The connection stays busy until the iterator is
+        exhausted or closed.
         
         Args:
             conn: Database connection
             tags: List of tag numbers to fetch
-            batch_size: Size of each batch for chunked queries
+            batch_size: Number of tags inserted per executemany call
+            chunk_size: Number of rows per yielded DataFrame
             
-        Returns:
-            DataFrame containing all matching records
+        Yields:
+            DataFrames containing the matching records
             
         Raises:
             DatabaseQueryError: If query fails
         """
+        if not tags:
+            return
+        
         try:
-            result_dfs = []
+            cursor = conn.cursor()
             
-            for i in range(0, len(tags), batch_size):
-                chunk = tags[i:i + batch_size]
-                placeholders = ",".join(['?'] * len(chunk))
+            try:
+                # Tags that differ only in case are distinct here but equal
+                # under a case-insensitive collation; skip those duplicates
+                cursor.execute(
+                    "CREATE TABLE #TagTemp "
+                    "(Tag NVARCHAR(450) COLLATE DATABASE_DEFAULT "
+                    "PRIMARY KEY WITH (IGNORE_DUP_KEY = ON))"
+                )
+                
+                cursor.fast_executemany = True
+                unique_tags = list(dict.fromkeys(tags))
+                
+                for i in range(0, len(unique_tags), batch_size):
+                    cursor.executemany(
+                        "INSERT INTO #TagTemp (Tag) VALUES (?)",
+                        [(tag,) for tag in unique_tags[i:i + batch_size]]
+                    )
                 
-                # Safe parameterized query
                 query = f"""
-                    SELECT * FROM {self.config.table_name} 
-                    WHERE [{self.config.tag_column}] IN ({placeholders})
+                    SELECT t.* FROM {self.config.table_name} t 
+                    INNER JOIN #TagTemp x ON t.[{self.config.tag_column}] = x.Tag
                 """
                 
-                chunk_df = pd.read_sql(query, conn, params=chunk)
-                result_dfs.append(chunk_df)
-            
-            if not result_dfs:
-                return pd.DataFrame()
+                chunks = pd.read_sql_query(query, conn, chunksize=chunk_size)
+                fetched_count = 0
+                
+                try:
+                    for chunk_df in chunks:
+                        fetched_count += len(chunk_df)
+                        yield chunk_df
+                finally:
+                    # Release the result cursor before touching the temp table
+                    chunks.close()
             
-            combined_df = pd.concat(result_dfs, ignore_index=True)
-            logger.info(f"Fetched {len(combined_df)} records for {len(tags)} tags")
+            finally:
+                cursor.execute(
+                    "IF OBJECT_ID('tempdb..#TagTemp') IS NOT NULL DROP TABLE #TagTemp"
+                )
             
-            return combined_df
+            logger.info(f"Fetched {fetched_count} records for {len(tags)} tags")
         
         except Exception as e:
             raise DatabaseQueryError(f"Failed to fetch records by tags: {e}")
@@ -217,36 +297,49 @@ class DatabaseManager:
         """
         Perform batch updates on database records.
         
+        Updates for the same tag are merged first, in order, so a later
+        row's value wins as it would with one UPDATE per row. The merged
+        updates that change the same set of columns are then sent together
+        through a single fast_executemany call.
+        
         Args:
             conn: Database connection
             updates: List of (tag_number, {column: value}) tuples
             
         Returns:
-            Number of records updated
+            Number of distinct records updated
             
         Raises:
             DatabaseQueryError: If update fails
         """
         try:
             cursor = conn.cursor()
-            updated_count = 0
+            cursor.fast_executemany = True
             
+            # Merge repeated tags in row order (last row wins per column)
+            merged: Dict[str, Dict[str, any]] = {}
             for tag, changes in updates:
-                if not changes:
-                    continue
-                
-                # Build SET clause with proper SQL injection protection
-                set_parts = []
-                values = []
-                
-                for col_name, value in changes.items():
-                    # Escape column names by doubling up square brackets
-                    safe_col = col_name.replace(']', ']]')
-                    set_parts.append(f"[{safe_col}] = ?")
-                    values.append(value)
-                
-                set_clause = ", ".join(set_parts)
-                values.append(tag)  # Add tag for WHERE clause
+                if changes:
+                    merged.setdefault(tag, {}).update(changes)
+            
+            # Group updates by the columns they change, so each distinct
+            # SET clause is prepared once and sent as a single batch
+            groups: Dict[Tuple[str, ...], List[tuple]] = defaultdict(list)
+            
+            for tag, changes in merged.items():
+                columns = tuple(sorted(changes))
+                groups[columns].append(
+                    tuple(changes[col] for col in columns) + (tag,)
+                )
+            
+            updated_count = 0
+            
+            for columns, param_rows in groups.items():
+                # Build SET clause with proper SQL injection protection;
+                # escape column names by doubling up square brackets
+                set_clause = ", ".join(
+                    f"[{col.replace(']', ']]')}] = ?" for col in columns
+                )
                 
                 query = f"""
                     UPDATE {self.config.table_name} 
@@ -254,8 +347,9 @@ class DatabaseManager:
                     WHERE [{self.config.tag_column}] = ?
                 """
                 
-                cursor.execute(query, values)
-                updated_count += cursor.rowcount
+                cursor.executemany(query, param_rows)
+                # rowcount is unreliable with fast_executemany, so count rows sent
+                updated_count += len(param_rows)
             
             conn.commit()
             logger.info(f"Successfully updated {updated_count} records")
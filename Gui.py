@@ -3,9 +3,13 @@ GUI module for SQL Data Importer application.
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
+import json
 import threading
 import os
-from typing import Optional
+import queue
+import time
+from itertools import groupby
+from typing import Callable, Dict, List, Optional, Set
 import logging
 
 from config import DatabaseConfig, AppConfig, load_config
@@ -13,31 +17,102 @@ from import_service import ImportService
 
 logger = logging.getLogger(__name__)
 
+# Interval between log window refreshes, in milliseconds
+LOG_FLUSH_INTERVAL_MS = 50
+
+# Remembers the folder of the last file picked, across sessions
+LAST_DIRS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "logs", "last_dirs.json"
+)
+
+# Progress messages are shown at most once per this interval, in milliseconds
+PROGRESS_DEBOUNCE_MS = 50
+
+# Keys the read-only log window still honours (scrolling, caret movement
+# and focus traversal)
+_LOG_NAVIGATION_KEYS = frozenset({
+    "Up", "Down", "Left", "Right", "Prior", "Next", "Home", "End",
+    "Tab", "ISO_Left_Tab"
+})
+
 
 class ToolTip:
-    """Creates tooltips for widgets."""
+    """
+    Creates tooltips for widgets.
+    
+    Construction only records the widget and adds a shared bindtag; the
+    event handlers are bound once per class and a single Toplevel is
+    created on the first hover and reused by every tooltip.
+    """
+    
+    _BINDTAG = "ToolTipped"
+    _instances: Dict[str, "ToolTip"] = {}
+    _bound_interps: Set[object] = set()
+    _window: Optional[tk.Toplevel] = None
+    _label: Optional[tk.Label] = None
+    _owner: Optional["ToolTip"] = None
     
     def __init__(self, widget, text: str = 'widget info', wait_time: int = 500):
         self.wait_time = wait_time
         self.wrap_length = 300
         self.widget = widget
         self.text = text
-        self.widget.bind("<Enter>", self.enter)
-        self.widget.bind("<Leave>", self.leave)
-        self.widget.bind("<ButtonPress>", self.leave)
         self.id = None
-        self.tw = None
+        self._enter_time: Optional[float] = None
+        
+        ToolTip._instances[str(widget)] = self
+        widget.bindtags(widget.bindtags() + (self._BINDTAG,))
+        
+        # Class bindings belong to the Tcl interpreter, so bind them once each
+        if widget.tk not in ToolTip._bound_interps:
+            widget.bind_class(self._BINDTAG, "<Enter>", ToolTip._on_enter)
+            widget.bind_class(self._BINDTAG, "<Leave>", ToolTip._on_leave)
+            widget.bind_class(self._BINDTAG, "<ButtonPress>", ToolTip._on_leave)
+            ToolTip._bound_interps.add(widget.tk)
+    
+    @staticmethod
+    def _on_enter(event):
+        tip = ToolTip._instances.get(str(event.widget))
+        if tip:
+            tip.enter(event)
+    
+    @staticmethod
+    def _on_leave(event):
+        tip = ToolTip._instances.get(str(event.widget))
+        if tip:
+            tip.leave(event)
+    
+    @property
+    def tw(self) -> Optional[tk.Toplevel]:
+        """The shared tooltip window while it is showing this tooltip."""
+        return ToolTip._window if ToolTip._owner is self else None
     
     def enter(self, event=None):
+        self._enter_time = time.perf_counter()
         self.schedule()
     
     def leave(self, event=None):
-        self.unschedule()
+        # Any pending timer sees the cleared time and does nothing
+        self._enter_time = None
         self.hidetip()
     
     def schedule(self):
-        self.unschedule()
-        self.id = self.widget.after(self.wait_time, self.showtip)
+        """Arm the show timer unless one is already pending."""
+        if self.id is None:
+            self.id = self.widget.after(self.wait_time, self._maybe_show)
+    
+    def _maybe_show(self):
+        """Show the tip once the pointer has rested for wait_time."""
+        self.id = None
+        if self._enter_time is None:
+            return
+        
+        remaining_ms = self.wait_time - (time.perf_counter() - self._enter_time) * 1000
+        if remaining_ms > 0:
+            # Re-entered since the timer was armed; wait out the rest
+            self.id = self.widget.after(int(remaining_ms) + 1, self._maybe_show)
+        else:
+            self.showtip()
     
     def unschedule(self):
         id_val = self.id
@@ -56,26 +131,47 @@ class ToolTip:
         x += self.widget.winfo_rootx() + 25
         y += self.widget.winfo_rooty() + 20
         
-        self.tw = tk.Toplevel(self.widget)
-        self.tw.wm_overrideredirect(True)
-        self.tw.wm_geometry(f"+{x}+{y}")
-        
-        label = tk.Label(
-            self.tw,
-            text=self.text,
-            justify='left',
-            background="#ffffe0",
-            relief='solid',
-            borderwidth=1,
-            font=("Tahoma", 8, "normal")
-        )
-        label.pack(ipadx=1)
+        window = ToolTip._window
+        if window is None or not window.winfo_exists():
+            window = tk.Toplevel(self.widget)
+            window.wm_overrideredirect(True)
+            
+            ToolTip._label = tk.Label(
+                window,
+                justify='left',
+                background="#ffffe0",
+                relief='solid',
+                borderwidth=1,
+                font=("Tahoma", 8, "normal")
+            )
+            ToolTip._label.pack(ipadx=1)
+            ToolTip._window = window
+        
+        ToolTip._label.config(text=self.text)
+        window.wm_geometry(f"+{x}+{y}")
+        window.deiconify()
+        window.lift()
+        ToolTip._owner = self
     
     def hidetip(self):
-        tw = self.tw
-        self.tw = None
-        if tw:
-            tw.destroy()
+        if ToolTip._owner is self:
+            ToolTip._owner = None
+            if ToolTip._window is not None and ToolTip._window.winfo_exists():
+                ToolTip._window.withdraw()
+    
+    def destroy(self):
+        """Unregister this tooltip; the last one destroys the shared window."""
+        self._enter_time = None
+        self.unschedule()
+        self.hidetip()
+        ToolTip._instances.pop(str(self.widget), None)
+        
+        if not ToolTip._instances and ToolTip._window is not None:
+            window, ToolTip._window, ToolTip._label = ToolTip._window, None, None
+            try:
+                window.destroy()
+            except tk.TclError:
+                pass  # Already destroyed along with its parent
 
 
 class DBImporterApp:
@@ -105,12 +201,33 @@ class DBImporterApp:
         # File paths
         self.full_input_path = ""
         self.full_config_path = ""
+        self._last_dir = self._load_last_dir()
         
         # Display variables
         self.input_filename_var = tk.StringVar()
         self.config_filename_var = tk.StringVar()
         self.progress_var = tk.StringVar(value="")
         
+        # Log lines from any thread, written to the log window by one pump
+        self._log_queue: "queue.Queue[tuple]" = queue.Queue()
+        
+        # Latest progress message, shown by a single pending flush
+        self._progress_lock = threading.Lock()
+        self._last_progress_msg: Optional[str] = None
+        self._progress_pending = False
+        
+        # What the progress widgets currently show, to skip redundant updates
+        self._shown_progress_msg = ""
+        self._progress_visible = False
+        
+        # One long-lived thread runs connection checks and imports in order
+        self._bg_queue: "queue.SimpleQueue[Callable[[], None]]" = queue.SimpleQueue()
+        threading.Thread(
+            target=self._bg_worker_loop,
+            name="importer-background",
+            daemon=True
+        ).start()
+        
         # Import service
         self.import_service = None
         if self.config_loaded:
@@ -121,12 +238,23 @@ class DBImporterApp:
             )
         
         # Setup UI
+        self._tooltips: List[ToolTip] = []
         self._setup_ui()
+        self._log_pump_id = self.root.after(LOG_FLUSH_INTERVAL_MS, self._drain_log_queue)
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         
         # Start connection check
         if self.config_loaded:
             self.root.after(100, self.auto_check_connection)
     
+    def _on_close(self):
+        """Tear down tooltips and the log pump before destroying the root."""
+        self.root.after_cancel(self._log_pump_id)
+        for tooltip in self._tooltips:
+            tooltip.destroy()
+        self._tooltips.clear()
+        self.root.destroy()
+    
     def _setup_ui(self):
         """Setup the user interface."""
         style = ttk.Style()
@@ -179,6 +307,12 @@ class DBImporterApp:
                 font=('Segoe UI', 8),
                 foreground="gray"
             ).pack(side=tk.LEFT, padx=(5, 0))
+            
+            ttk.Button(
+                status_frame,
+                text="⟳ Refresh DB Cache",
+                command=self.refresh_database_cache
+            ).pack(side=tk.RIGHT)
     
     def _create_file_selection_frame(self, parent):
         """Create file selection frame."""
@@ -202,6 +336,7 @@ class DBImporterApp:
             "No file selected",
             self.app_config.tooltip_wait_time if self.app_config else 500
         )
+        self._tooltips.append(self.tooltip_input)
         
         ttk.Button(
             file_frame,
@@ -226,6 +361,7 @@ class DBImporterApp:
             "No file selected",
             self.app_config.tooltip_wait_time if self.app_config else 500
         )
+        self._tooltips.append(self.tooltip_config)
         
         ttk.Button(
             file_frame,
@@ -285,26 +421,71 @@ class DBImporterApp:
         
         self.log_text = scrolledtext.ScrolledText(
             log_frame,
-            state='disabled',
             height=12,
             font=("Consolas", 9),
             wrap=tk.WORD
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
         
+        # Stays in 'normal' state so writes need no state toggling;
+        # user edits are swallowed here instead
+        self.log_text.bind("<Key>", self._block_log_edit)
+        for event in ("<<Cut>>", "<<Paste>>", "<<PasteSelection>>", "<<Clear>>"):
+            self.log_text.bind(event, lambda e: "break")
+        
+        # Keep keyboard traversal working: Tab moves focus instead of
+        # inserting a tab character into the log
+        self.log_text.bind(
+            "<Tab>", lambda e: (e.widget.tk_focusNext().focus_set(), "break")[1]
+        )
+        for event in ("<Shift-Tab>", "<ISO_Left_Tab>"):
+            try:
+                self.log_text.bind(
+                    event, lambda e: (e.widget.tk_focusPrev().focus_set(), "break")[1]
+                )
+            except tk.TclError:
+                pass  # ISO_Left_Tab is an X11-only keysym
+        
         # Configure tags for colored output
         self.log_text.tag_config("error", foreground="red")
         self.log_text.tag_config("success", foreground="#008000")
         self.log_text.tag_config("header", foreground="#00008B", font=("Consolas", 9, "bold"))
     
+    @staticmethod
+    def _load_last_dir() -> str:
+        """Read the last-used folder; falls back to the working directory."""
+        try:
+            with open(LAST_DIRS_PATH, encoding="utf-8") as f:
+                last_dir = json.load(f).get("last_dir", "")
+        except (OSError, ValueError, AttributeError):
+            return os.getcwd()
+        
+        return last_dir if isinstance(last_dir, str) and os.path.isdir(last_dir) else os.getcwd()
+    
+    def _remember_dir(self, filename: str):
+        """Persist the folder of a picked file for the next dialog."""
+        folder = os.path.dirname(filename)
+        if not folder or folder == self._last_dir:
+            return
+        
+        self._last_dir = folder
+        try:
+            os.makedirs(os.path.dirname(LAST_DIRS_PATH), exist_ok=True)
+            with open(LAST_DIRS_PATH, "w", encoding="utf-8") as f:
+                json.dump({"last_dir": folder}, f)
+        except OSError as e:
+            logger.warning(f"Could not save last-used folder: {e}")
+    
     def browse_input(self):
         """Browse for input Excel file."""
         filename = filedialog.askopenfilename(
             title="Select Input Excel File",
+            initialdir=self._last_dir,
             filetypes=[("Excel Files", "*.xlsx *.xls"), ("All Files", "*.*")]
         )
         
         if filename:
+            self._remember_dir(filename)
             self.full_input_path = filename
             self.input_filename_var.set(os.path.basename(filename))
             self.tooltip_input.text = filename
@@ -316,10 +497,12 @@ class DBImporterApp:
         """Browse for config Excel file."""
         filename = filedialog.askopenfilename(
             title="Select Configuration Excel File",
+            initialdir=self._last_dir,
             filetypes=[("Excel Files", "*.xlsx *.xls"), ("All Files", "*.*")]
         )
         
         if filename:
+            self._remember_dir(filename)
             self.full_config_path = filename
             self.config_filename_var.set(os.path.basename(filename))
             self.tooltip_config.text = filename
@@ -339,11 +522,38 @@ class DBImporterApp:
             self.log("✓ Auto-detected configuration file", "success")
     
     def log(self, message: str, tag: Optional[str] = None):
-        """Add message to log window."""
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, message + "\n", tag)
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        """Queue a message for the log window; safe to call from any thread."""
+        self._log_queue.put((message, tag))
+    
+    def _drain_log_queue(self):
+        """Write all queued log messages in one widget update, then re-arm."""
+        pending = []
+        try:
+            while True:
+                pending.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if pending:
+            # One Tcl insert for all lines: text, tags, text, tags, ...
+            # with consecutive lines of the same tag merged into one block
+            chunks = []
+            for tag, run in groupby(pending, key=lambda item: item[1]):
+                chunks.append("".join(message + "\n" for message, _ in run))
+                chunks.append(tag or "")
+            self.log_text.insert(tk.END, *chunks)
+            self.log_text.see(tk.END)
+        
+        self._log_pump_id = self.root.after(LOG_FLUSH_INTERVAL_MS, self._drain_log_queue)
+    
+    @staticmethod
+    def _block_log_edit(event) -> Optional[str]:
+        """Let copy, select-all, navigation and focus traversal through."""
+        if event.keysym in _LOG_NAVIGATION_KEYS:
+            return None
+        if event.state & 0x4 and event.keysym.lower() in ("c", "a", "insert"):
+            return None
+        return "break"
     
     def toggle_buttons(self, state: str):
         """Enable or disable action buttons."""
@@ -352,16 +562,58 @@ class DBImporterApp:
     
     def show_progress(self, message: str):
         """Show progress indicator."""
-        self.progress_var.set(message)
-        if not self.progress_bar.winfo_viewable():
+        # Each StringVar.set() and geometry query is a Tcl round-trip
+        if message != self._shown_progress_msg:
+            self._shown_progress_msg = message
+            self.progress_var.set(message)
+        
+        if not self._progress_visible:
             self.progress_bar.pack(side=tk.LEFT, padx=(10, 0))
             self.progress_bar.start(10)
+            self._progress_visible = True
+    
+    def _queue_progress(self, message: str):
+        """Debounced show_progress(); safe to call from any thread."""
+        with self._progress_lock:
+            self._last_progress_msg = message
+            if self._progress_pending:
+                return
+            self._progress_pending = True
+        
+        self.root.after(PROGRESS_DEBOUNCE_MS, self._flush_progress)
+    
+    def _flush_progress(self):
+        """Show the most recent queued progress message."""
+        with self._progress_lock:
+            message = self._last_progress_msg
+            self._progress_pending = False
+        
+        # None means the progress was hidden while this flush was pending
+        if message is not None:
+            self.show_progress(message)
     
     def hide_progress(self):
         """Hide progress indicator."""
+        with self._progress_lock:
+            self._last_progress_msg = None
+        self._shown_progress_msg = ""
         self.progress_var.set("")
         self.progress_bar.stop()
         self.progress_bar.pack_forget()
+        self._progress_visible = False
+    
+    def _bg_worker_loop(self):
+        """Run queued background tasks one at a time, forever."""
+        while True:
+            task = self._bg_queue.get()
+            try:
+                task()
+            except Exception:
+                logger.exception("Background task failed")
+    
+    def run_in_background(self, task: Callable[[], None]):
+        """Queue a callable for the background worker thread."""
+        self._bg_queue.put(task)
     
     def auto_check_connection(self):
         """Check database connection in background."""
@@ -382,9 +634,19 @@ class DBImporterApp:
                     lambda: self.lbl_status.config(text="❌ Offline", foreground="red")
                 )
                 if error_msg:
-                    self.root.after(0, lambda: self.log(f"DB Error: {error_msg}", "error"))
+                    self.log(f"DB Error: {error_msg}", "error")
         
-        threading.Thread(target=perform_check, daemon=True).start()
+        self.run_in_background(perform_check)
+    
+    def refresh_database_cache(self):
+        """Discard cached table metadata and tags, then re-check the connection."""
+        if not self.import_service:
+            return
+        
+        self.import_service.clear_metadata_cache()
+        self.log("✓ Database cache cleared; metadata will be re-read on next run", "success")
+        self.lbl_status.config(text="⏳ Checking...", foreground="blue")
+        self.auto_check_connection()
     
     def confirm_import(self):
         """Show confirmation dialog before real import."""
@@ -402,15 +664,18 @@ class DBImporterApp:
     
     def start_process(self, dry_run: bool):
         """Start the import process."""
+        # Snapshot the selection once; a single stat per file
+        input_path, config_path = self.full_input_path, self.full_config_path
+        
         # Validation
-        if not self.full_input_path or not os.path.exists(self.full_input_path):
+        if not input_path or not os.path.isfile(input_path):
             messagebox.showerror(
                 "File Error",
                 "Please select a valid Input Excel file."
             )
             return
         
-        if not self.full_config_path or not os.path.exists(self.full_config_path):
+        if not config_path or not os.path.isfile(config_path):
             messagebox.showerror(
                 "File Error",
                 "Please select a valid Configuration Excel file."
@@ -425,9 +690,7 @@ class DBImporterApp:
             return
         
         # Clear log
-        self.log_text.config(state='normal')
         self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state='disabled')
         
         # Disable buttons
         self.toggle_buttons("disabled")
@@ -439,10 +702,10 @@ class DBImporterApp:
         def run_import():
             try:
                 result = self.import_service.run_import(
-                    self.full_input_path,
-                    self.full_config_path,
+                    input_path,
+                    config_path,
                     dry_run,
-                    progress_callback=lambda msg: self.root.after(0, lambda: self.show_progress(msg))
+                    progress_callback=self._queue_progress
                 )
                 
                 # Show completion message
@@ -476,7 +739,7 @@ class DBImporterApp:
                 self.root.after(0, lambda: self.toggle_buttons("normal"))
                 self.root.after(0, self.hide_progress)
         
-        threading.Thread(target=run_import, daemon=True).start()
+        self.run_in_background(run_import)
 
 
 def run_gui(config_file: Optional[str] = None):
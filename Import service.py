@@ -2,20 +2,34 @@
 Main import service that orchestrates the data import process.
 """
 import pandas as pd
-from typing import Callable, Optional, List, Tuple
+from typing import AbstractSet, Any, Callable, Dict, Optional, List, Tuple
 import logging
 import os
+import pickle
+import threading
+import time
+from itertools import groupby
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 
 from config import DatabaseConfig, AppConfig
 from database import DatabaseManager, DatabaseConnectionError, DatabaseQueryError
 from data_processor import (
     ConfigLoader, DataValidator, SheetProcessor, 
-    ReportGenerator, ProcessingConfig, SheetResult, ValidationError
+    ReportGenerator, ProcessingConfig, SheetResult, ValidationError,
+    ParsedSheet, EXCEL_ENGINE, TEXT_DTYPE, get_sheet_names
 )
 
 logger = logging.getLogger(__name__)
 
+# Row layout of the summary table: sheet name, result, status
+_ROW_FMT = "{:<25} | {:<15} | {:<10}".format
+
+# Default on-disk location of cached database metadata
+METADATA_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "logs", "metadata_cache.pkl"
+)
+
 
 @dataclass
 class ImportResult:
@@ -29,6 +43,76 @@ class ImportResult:
     error_message: Optional[str] = None
 
 
+class MetadataCache:
+    """
+    Pickle-backed cache of database lookups that rarely change.
+    
+    Entries expire after ttl_seconds; a TTL of 0 or less disables the
+    cache so every lookup goes to the database.
+    """
+    
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+    
+    def get_or_fetch(self, key: Tuple, fetcher: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling fetcher on a miss.
+        
+        Args:
+            key: Hashable cache key
+            fetcher: Callable producing the fresh value
+            
+        Returns:
+            Cached or freshly fetched value
+        """
+        if self.ttl_seconds <= 0:
+            return fetcher()
+        
+        entries = self._load()
+        entry = entries.get(key)
+        if entry is not None and time.time() - entry[0] < self.ttl_seconds:
+            logger.info(f"Using cached {key[-1]} for {key[0]}/{key[1]}")
+            return entry[1]
+        
+        value = fetcher()
+        entries[key] = (time.time(), value)
+        self._save(entries)
+        return value
+    
+    def invalidate(self):
+        """Drop all cached entries."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove metadata cache: {e}")
+    
+    def _load(self) -> Dict[Tuple, Tuple[float, Any]]:
+        """Read the cache file; a missing or unreadable file reads as empty."""
+        try:
+            with open(self.path, "rb") as f:
+                entries = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable metadata cache: {e}")
+            return {}
+        return entries if isinstance(entries, dict) else {}
+    
+    def _save(self, entries: Dict[Tuple, Tuple[float, Any]]):
+        """Write the cache file atomically; failures only cost a cache miss."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write metadata cache: {e}")
+
+
 class ImportService:
     """Main service for importing Excel data into SQL database."""
     
@@ -50,6 +134,10 @@ class ImportService:
         self.app_config = app_config
         self.log_callback = log_callback or self._default_logger
         self.db_manager = DatabaseManager(db_config)
+        self.metadata_cache = MetadataCache(
+            METADATA_CACHE_PATH,
+            app_config.metadata_cache_ttl
+        )
     
     def _default_logger(self, message: str, tag: Optional[str] = None):
         """Default logger if no callback provided."""
@@ -64,6 +152,23 @@ class ImportService:
         """Internal logging method."""
         self.log_callback(message, tag)
     
+    def clear_metadata_cache(self):
+        """Force the next import to re-read table metadata and tags."""
+        self.metadata_cache.invalidate()
+        self.db_manager.clear_metadata_cache()
+    
+    def _fetch_table_metadata(self, conn) -> Tuple[List[str], List[str]]:
+        """Query table metadata, bypassing the manager's in-memory copy."""
+        # Only reached on a disk-cache miss or expiry, which must see the
+        # current schema rather than whatever this manager read earlier
+        self.db_manager.clear_metadata_cache()
+        return self.db_manager.get_table_metadata(conn)
+    
+    def _cache_key(self, kind: str) -> Tuple:
+        """Cache key for a lookup against the configured table."""
+        cfg = self.db_config
+        return (cfg.server, cfg.database, cfg.table_name, cfg.tag_column, kind)
+    
     def test_connection(self) -> Tuple[bool, Optional[str]]:
         """
         Test database connection.
@@ -105,52 +210,55 @@ class ImportService:
             processing_config = ConfigLoader.load_from_excel(config_path)
             self._log("Configuration loaded successfully.\n")
             
-            # Step 2: Connect to database
+            # Step 2: Connect to database; the session closes it on exit
             self._log(f"Connecting to SQL Server: {self.db_config.server}...")
-            conn = self.db_manager.connect()
-            self._log("SQL connection successful.\n")
-            
-            # Step 3: Get database metadata
-            self._log("Fetching database metadata...")
-            sql_columns, numeric_columns = self.db_manager.get_table_metadata(conn)
-            self._log(f"Found {len(sql_columns)} columns ({len(numeric_columns)} numeric)\n")
-            
-            # Step 4: Get existing tags
-            self._log("Fetching existing tags from database...")
-            existing_tags = self.db_manager.get_existing_tags(conn)
-            self._log(f"Found {len(existing_tags)} tags in database.\n")
-            
-            # Step 5: Initialize processors
-            validator = DataValidator(
-                numeric_columns, 
-                self.app_config.float_comparison_threshold
-            )
-            
-            sheet_processor = SheetProcessor(
-                processing_config,
-                sql_columns,
-                validator,
-                self.db_config.tag_column
-            )
-            
-            # Step 6: Process Excel file
-            self._log(f"Reading input file: {os.path.basename(excel_path)}...\n")
-            
-            result = self._process_excel_file(
-                excel_path,
-                sheet_processor,
-                existing_tags,
-                conn,
-                dry_run,
-                progress_callback
-            )
+            with self.db_manager.session() as conn:
+                self._log("SQL connection successful.\n")
+                
+                # Step 3: Get database metadata
+                self._log("Fetching database metadata...")
+                sql_columns, numeric_columns = self.metadata_cache.get_or_fetch(
+                    self._cache_key("metadata"),
+                    lambda: self._fetch_table_metadata(conn)
+                )
+                self._log(f"Found {len(sql_columns)} columns ({len(numeric_columns)} numeric)\n")
+                
+                # Step 4: Get existing tags
+                self._log("Fetching existing tags from database...")
+                existing_tags = self.metadata_cache.get_or_fetch(
+                    self._cache_key("tags"),
+                    lambda: self.db_manager.get_existing_tags(conn)
+                )
+                self._log(f"Found {len(existing_tags)} tags in database.\n")
+                
+                # Step 5: Initialize processors
+                validator = DataValidator(
+                    numeric_columns, 
+                    self.app_config.float_comparison_threshold
+                )
+                
+                sheet_processor = SheetProcessor(
+                    processing_config,
+                    sql_columns,
+                    validator,
+                    self.db_config.tag_column
+                )
+                
+                # Step 6: Process Excel file
+                self._log(f"Reading input file: {os.path.basename(excel_path)}...\n")
+                
+                result = self._process_excel_file(
+                    excel_path,
+                    sheet_processor,
+                    existing_tags,
+                    conn,
+                    dry_run,
+                    progress_callback
+                )
             
             # Step 7: Generate summary
             self._generate_summary(result)
             
-            # Close connection
-            self.db_manager.close()
-            
             self._log("\nPROCESS COMPLETED.", "header")
             
             return result
@@ -196,14 +304,19 @@ class ImportService:
         self,
         excel_path: str,
         sheet_processor: SheetProcessor,
-        existing_tags: set,
+        existing_tags: AbstractSet[str],
         conn,
         dry_run: bool,
         progress_callback: Optional[Callable[[str], None]]
     ) -> ImportResult:
-        """Process all sheets in the Excel file."""
-        xls = pd.ExcelFile(excel_path)
+        """
+        Process all sheets in the Excel file.
         
+        Sheets are read concurrently on a thread pool, their tags are fetched
+        from SQL in one query, and the diffs run on a second pool. Batch updates
+        are applied here, in sheet order, while later sheets are still being
+        diffed, so the single connection is only ever used from this thread.
+        """
         sheet_results = []
         all_updates = []
         all_validation_errors = []
@@ -212,37 +325,44 @@ class ImportService:
         
         allowed_sheets = sheet_processor.config.allowed_sheets
         
-        for sheet_name in xls.sheet_names:
-            if sheet_name not in allowed_sheets:
-                continue
-            
+        sheet_names = [
+            name for name in get_sheet_names(excel_path) if name in allowed_sheets
+        ]
+        
+        tag_column = sheet_processor.tag_column
+        
+        # Parse every sheet first (concurrently) so the tags of all sheets
+        # can be fetched from SQL in a single round-trip
+        parsed_sheets = []
+        for sheet_name, parsed_future in self._read_sheets(
+            excel_path,
+            sheet_names,
+            sheet_processor,
+            existing_tags,
+            progress_callback
+        ):
             try:
-                # Process sheet
-                sheet_result, updates, validation_errors = sheet_processor.process_sheet(
-                    excel_path,
-                    sheet_name,
-                    existing_tags,
-                    pd.DataFrame(),  # Will fetch SQL data as needed
-                    progress_callback
-                )
+                parsed_sheets.append(parsed_future.result())
+            except Exception as e:
+                error_msg = f"Error processing sheet '{sheet_name}': {e}"
+                self._log(error_msg, "error")
+                logger.exception(f"Sheet processing error: {sheet_name}")
+                parsed_sheets.append(ParsedSheet(
+                    sheet_name, None, [], [],
+                    SheetResult(sheet_name, "Processing Error", "ERROR")
+                ))
+        
+        sql_by_sheet = self._fetch_sheet_records(conn, parsed_sheets, tag_column)
+        
+        # Sheets are diffed on the pool while this thread writes, in order
+        sheet_diffs = self._submit_sheet_diffs(sheet_processor, parsed_sheets, sql_by_sheet)
+        
+        for parsed, diff_future in zip(parsed_sheets, sheet_diffs):
+            sheet_name = parsed.sheet_name
+            try:
+                all_validation_errors.extend(parsed.validation_errors)
                 
-                # Fetch SQL data for tags in this sheet if there are potential updates
-                if updates:
-                    tags_in_sheet = [tag for tag, _ in updates]
-                    sql_data = self.db_manager.fetch_records_by_tags(
-                        conn,
-                        tags_in_sheet,
-                        self.app_config.batch_size
-                    )
-                    
-                    # Re-process with actual SQL data
-                    sheet_result, updates, validation_errors = sheet_processor.process_sheet(
-                        excel_path,
-                        sheet_name,
-                        existing_tags,
-                        sql_data,
-                        progress_callback
-                    )
+                sheet_result, updates = diff_future.result()
                 
                 # Handle updates
                 if updates:
@@ -261,7 +381,6 @@ class ImportService:
                         self._log(f"○ {sheet_name}: {len(updates)} changes detected (dry-run)")
                 
                 sheet_results.append(sheet_result)
-                all_validation_errors.extend(validation_errors)
                 
             except Exception as e:
                 error_msg = f"Error processing sheet '{sheet_name}': {e}"
@@ -293,14 +412,135 @@ class ImportService:
             error_report_path=error_report_path
         )
     
+    def _fetch_sheet_records(
+        self,
+        conn,
+        parsed_sheets: List[ParsedSheet],
+        tag_column: str
+    ) -> Dict[str, List[pd.DataFrame]]:
+        """
+        Fetch SQL records for every sheet in one query and split them by sheet.
+        
+        The result is consumed one chunk at a time; each chunk is split into
+        per-sheet slices and then released, so the full result set is never
+        materialized as a single frame.
+        
+        Args:
+            conn: Database connection
+            parsed_sheets: Sheets returned by SheetProcessor.read_sheet()
+            tag_column: Name of the tag column
+            
+        Returns:
+            Dictionary of {sheet_name: [sql_record_slices_for_its_tags]}
+        """
+        sheet_tags = {
+            parsed.sheet_name: parsed.tags(tag_column)
+            for parsed in parsed_sheets
+            if parsed.data is not None
+        }
+        all_tags = set().union(*sheet_tags.values())
+        
+        if not all_tags:
+            return {}
+        
+        sheet_records: Dict[str, List[pd.DataFrame]] = {name: [] for name in sheet_tags}
+        
+        for chunk in self.db_manager.fetch_records_by_tags(
+            conn,
+            list(all_tags),
+            self.app_config.batch_size
+        ):
+            chunk_tags = chunk[tag_column].astype(TEXT_DTYPE).str.strip()
+            
+            for sheet_name, tags in sheet_tags.items():
+                in_sheet = chunk_tags.isin(tags).to_numpy()
+                if in_sheet.any():
+                    sheet_records[sheet_name].append(chunk[in_sheet])
+        
+        return sheet_records
+    
+    def _submit_sheet_diffs(
+        self,
+        sheet_processor: SheetProcessor,
+        parsed_sheets: List[ParsedSheet],
+        sql_by_sheet: Dict[str, List[pd.DataFrame]]
+    ) -> List[Future]:
+        """
+        Diff every parsed sheet against its SQL records on a thread pool.
+        
+        The diffs are independent and spend their time in numpy (and
+        numexpr, when present), so they overlap with each other and with
+        the batch updates the caller runs on its own thread.
+        
+        Returns:
+            One future per parsed sheet, in the same order
+        """
+        max_workers = max(1, min(self.app_config.max_sheet_workers, len(parsed_sheets)))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        
+        futures = []
+        for parsed in parsed_sheets:
+            futures.append(executor.submit(
+                sheet_processor.diff,
+                parsed,
+                sql_by_sheet.get(parsed.sheet_name, ())
+            ))
+        
+        # Queued diffs still run; the workers exit once the queue drains
+        executor.shutdown(wait=False)
+        
+        return futures
+    
+    def _read_sheets(
+        self,
+        excel_path: str,
+        sheet_names: List[str],
+        sheet_processor: SheetProcessor,
+        existing_tags: AbstractSet[str],
+        progress_callback: Optional[Callable[[str], None]]
+    ) -> List[Tuple[str, Future]]:
+        """
+        Read every sheet on a thread pool and wait for all of them.
+        
+        Workbook readers are not safe to share between threads, so each
+        worker lazily opens its own handle and reuses it for every sheet
+        it picks up; the handles are closed once all reads have finished.
+        
+        Returns:
+            List of (sheet_name, completed_future), in sheet order
+        """
+        worker_state = threading.local()
+        worker_files: List[pd.ExcelFile] = []
+        
+        def read(sheet_name: str):
+            excel_file = getattr(worker_state, "excel_file", None)
+            if excel_file is None:
+                excel_file = pd.ExcelFile(excel_path, engine=EXCEL_ENGINE)
+                worker_state.excel_file = excel_file
+                worker_files.append(excel_file)
+            
+            return sheet_processor.read_sheet(
+                excel_file,
+                sheet_name,
+                existing_tags,
+                progress_callback
+            )
+        
+        max_workers = max(1, min(self.app_config.max_sheet_workers, len(sheet_names)))
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return [(name, executor.submit(read, name)) for name in sheet_names]
+        finally:
+            for excel_file in worker_files:
+                excel_file.close()
+    
     def _generate_summary(self, result: ImportResult):
         """Generate and log summary of import operation."""
-        self._log("\n" + "=" * 60)
-        
-        # Header
-        row_format = "{:<25} | {:<15} | {:<10}"
-        self._log(row_format.format("Sheet Name", "Result", "Status"), "header")
-        self._log("-" * 60)
+        lines: List[Tuple[str, Optional[str]]] = [
+            ("\n" + "=" * 60, None),
+            (_ROW_FMT("Sheet Name", "Result", "Status"), "header"),
+            ("-" * 60, None),
+        ]
         
         # Sheet results
         for sheet_result in result.sheet_results:
@@ -311,17 +551,19 @@ class ImportService:
             if len(display_name) > 24:
                 display_name = display_name[:22] + '..'
             
-            self._log(
-                row_format.format(display_name, sheet_result.result, sheet_result.status),
-                status_tag
+            lines.append(
+                (_ROW_FMT(display_name, sheet_result.result, sheet_result.status), status_tag)
             )
         
-        self._log("=" * 60)
+        lines.append(("=" * 60, None))
         
         # Totals
-        self._log(f"\nTotal Detected Updates: {result.total_detected_updates}")
+        lines.append((f"\nTotal Detected Updates: {result.total_detected_updates}", None))
         if result.total_committed_updates > 0:
-            self._log(
-                f"Total Committed to DB:  {result.total_committed_updates}",
-                "success"
+            lines.append(
+                (f"Total Committed to DB:  {result.total_committed_updates}", "success")
             )
+        
+        # One log call per run of equally tagged lines rather than per line
+        for tag, run in groupby(lines, key=lambda line: line[1]):
+            self._log("\n".join(text for text, _ in run), tag)